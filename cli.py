@@ -69,7 +69,7 @@ def generate_sq_id(file_path: str) -> str:
     timestamp = str(time.time())
     salt = secrets.token_hex(4)
     hash_input = (file_path + timestamp + salt).encode("utf-8")
-    return hashlib.sha1(hash_input).hexdigest()[:10]
+    return hashlib.blake2b(hash_input, digest_size=5).hexdigest()
 
 
 def main():
@@ -1,7 +1,128 @@
 import csv
+import os
+import re
+from functools import lru_cache
 from typing import Dict, List, Set, Tuple, Optional
 
 
+_HEAD_SIZE = 64 * 1024
+
+
+def _read_head(file_path: str) -> bytes:
+    """Read the first _HEAD_SIZE bytes of a file for sniffing."""
+    with open(file_path, "rb") as f:
+        return f.read(_HEAD_SIZE)
+
+
+def _quick_detect_encoding(head: bytes) -> Optional[str]:
+    """
+    Detect the file encoding from a binary head sample.
+
+    Checks for a UTF-8 BOM, then pure 7-bit ASCII, then attempts a UTF-8
+    decode of the head. Returns None when the head is not valid UTF-8 so
+    callers fall back to the legacy encoding list.
+
+    Args:
+        head: Leading bytes of the file (see _read_head)
+
+    Returns:
+        Detected encoding name, or None if undetermined
+    """
+    if head.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    if all(b < 128 for b in head):
+        return "utf-8"
+    try:
+        head.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A failure within the last few bytes is just a multi-byte
+        # character cut off by the head read, not a bad encoding.
+        if e.start >= len(head) - 4:
+            return "utf-8"
+        return None
+
+
+_QUOTED_SPAN = re.compile(r'"[^"]*"')
+
+
+class _SniffedDialect(csv.Dialect):
+    """Minimal dialect built around a delimiter found by _sniff_delimiter."""
+    quotechar = '"'
+    doublequote = True
+    skipinitialspace = False
+    lineterminator = "\r\n"
+    quoting = csv.QUOTE_MINIMAL
+
+    def __init__(self, delimiter: str):
+        self.delimiter = delimiter
+        super().__init__()
+
+
+def _sniff_delimiter(sample: str) -> Optional[str]:
+    """
+    Pick the delimiter whose per-line count is consistent across the sample.
+
+    Quoted spans are stripped first so a candidate occurring inside quoted
+    fields cannot outvote the real delimiter. Counts each candidate on the
+    first ~20 lines; a candidate qualifies only if every line agrees on a
+    non-zero count, and ties go to the higher count. Returns None when no
+    candidate dominates, in which case the caller should fall back to
+    csv.Sniffer.
+
+    Args:
+        sample: Decoded leading text of the file
+
+    Returns:
+        The winning delimiter character, or None
+    """
+    lines = sample.splitlines()
+    # The head read may have cut the final line short; don't let it vote.
+    if len(lines) > 1 and not sample.endswith(("\n", "\r")):
+        lines = lines[:-1]
+    lines = [_QUOTED_SPAN.sub("", line) for line in lines[:20] if line.strip()]
+    if not lines:
+        return None
+
+    best, best_count = None, 0
+    for candidate in (",", ";", "\t", "|"):
+        count = lines[0].count(candidate)
+        if count > best_count and all(line.count(candidate) == count for line in lines[1:]):
+            best, best_count = candidate, count
+    return best
+
+
+@lru_cache(maxsize=None)
+def _detect_cached(file_path: str, mtime_ns: int, size: int) -> Tuple[Optional[str], csv.Dialect]:
+    """Head-sniff a file's encoding and dialect, memoized per file state."""
+    head = _read_head(file_path)
+    encoding = _quick_detect_encoding(head)
+    sample = head.decode(encoding or "windows-1252", errors="replace")
+    delimiter = _sniff_delimiter(sample)
+    if delimiter is not None:
+        dialect = _SniffedDialect(delimiter)
+    else:
+        dialect = csv.Sniffer().sniff(sample)
+    return encoding, dialect
+
+
+def _detect(file_path: str) -> Tuple[Optional[str], csv.Dialect]:
+    """
+    Detect a CSV file's encoding and dialect from one binary head read.
+
+    Results are cached keyed on (path, mtime, size) so repeated reads of
+    the same unchanged file skip the sniffing entirely.
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        Tuple of (encoding or None if undetermined, sniffed csv.Dialect)
+    """
+    st = os.stat(file_path)
+    return _detect_cached(file_path, st.st_mtime_ns, st.st_size)
+
+
 def read_csv_with_autodetect(file_path: str) -> List[Dict[str, str]]:
     """
     Reads a CSV file with auto-detected encoding and delimiter.
@@ -16,14 +137,15 @@ def read_csv_with_autodetect(file_path: str) -> List[Dict[str, str]]:
         UnicodeDecodeError: If no supported encoding works
         csv.Error: If CSV parsing fails
     """
-    encodings = ["utf-8", "utf-8-sig", "windows-1252", "latin-1"]
+    detected, dialect = _detect(file_path)
+    if detected:
+        encodings = [detected, "windows-1252", "latin-1"]
+    else:
+        encodings = ["windows-1252", "latin-1"]
 
     for encoding in encodings:
         try:
             with open(file_path, encoding=encoding) as f:
-                sample = f.read(2048)
-                f.seek(0)
-                dialect = csv.Sniffer().sniff(sample)
                 reader = csv.DictReader(f, dialect=dialect)
                 return [row for row in reader]
         except UnicodeDecodeError:
@@ -69,12 +191,22 @@ def write_queries(
         main_group: Name of the main group column (for labeling)
         metadata_path: Optional path for metadata CSV output
     """
+    # Sort once by value only; comparing the full query strings is wasted
+    # work and (None, query) entries from the combined case don't compare.
+    ordered = sorted(queries, key=_query_sort_key)
+
     # Write main query file
-    _write_queries_txt(queries, output_path, main_group)
+    _write_queries_txt(ordered, output_path, main_group)
 
     # Write metadata if requested
     if metadata_path:
-        _write_metadata_csv(queries, metadata_path, main_group)
+        _write_metadata_csv(ordered, metadata_path, main_group)
+
+
+def _query_sort_key(item: Tuple[Optional[str], str]) -> Tuple[bool, str]:
+    """Order queries by their main-group value, Nones last."""
+    val = item[0]
+    return (val is None, val or "")
 
 
 def _write_queries_txt(
@@ -83,14 +215,15 @@ def _write_queries_txt(
         main_group: Optional[str] = None
 ) -> None:
     """
-    Internal function to write queries to a text file.
+    Internal function to write already-ordered queries to a text file.
     """
-    with open(output_path, "w", encoding="utf-8") as f:
-        for val, query in sorted(queries):
-            if main_group:
-                f.write(f"-- {main_group}: {val} --\n{query}\n\n")
-            else:
-                f.write(f"{query}\n\n")
+    if main_group:
+        chunks = [f"-- {main_group}: {val} --\n{query}\n\n" for val, query in queries]
+    else:
+        chunks = [f"{query}\n\n" for _, query in queries]
+
+    with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(chunks)
 
 
 def _write_metadata_csv(
@@ -99,11 +232,11 @@ def _write_metadata_csv(
         main_group: Optional[str] = None
 ) -> None:
     """
-    Internal function to write query metadata to CSV.
+    Internal function to write already-ordered query metadata to CSV.
     """
-    with open(output_path, "w", encoding="utf-8", newline="") as f:
+    with open(output_path, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
         writer = csv.writer(f)
         writer.writerow(["query_id", "group_name", "term_value", "query_string"])
 
-        for i, (val, query) in enumerate(sorted(queries), start=1):
+        for i, (val, query) in enumerate(queries, start=1):
             writer.writerow([i, main_group if main_group else "", val, query])
\ No newline at end of file
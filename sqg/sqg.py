@@ -1,14 +1,24 @@
 import csv
 import os
-from typing import Dict, List, Set, Tuple, Union
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
 from datetime import datetime
 
-def clean_term(term: str, quote: bool) -> str:
+from .input_output import _detect, write_queries
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+@lru_cache(maxsize=None)
+def clean_term(term: str, quote: bool, has_space: bool = None) -> str:
     """Format a single term with or without quotes.
 
     Args:
         term: The term to format
         quote: Whether to wrap in quotes (also wraps if term contains spaces)
+        has_space: Precomputed result of `" " in term`, scanned if None
 
     Returns:
         Formatted term or empty string if term is empty
@@ -16,66 +26,97 @@ def clean_term(term: str, quote: bool) -> str:
     if not term:
         return ""
     term = term.strip()
-    if quote or " " in term:
+    if has_space is None:
+        has_space = " " in term
+    if quote or has_space:
         return f'"{term}"'
     return term
 
-def format_group(terms: Set[str], quote: bool, internal_operator: str = "OR") -> str:
-    """Format a group of terms as an OR group in parentheses.
+@lru_cache(maxsize=None)
+def format_group(terms: Tuple[str, ...], internal_operator: str = "OR") -> str:
+    """Format a group of already-cleaned terms as a group in parentheses.
 
     Args:
-        :param: Set of terms to join
-        :param: Whether to quote individual terms
+        :param: Tuple of pre-sorted, pre-quoted terms (see prepare_group_terms)
         :param internal_operator: How the terms are handled internally
     Returns:
         Formatted group string or empty string if no terms
     """
-    formatted = [clean_term(term, quote) for term in sorted(terms) if term]
-    return f"({' {} '.format(internal_operator).join(formatted)})" if formatted else ""
+    return f"({' {} '.format(internal_operator).join(terms)})" if terms else ""
+
+def prepare_group_terms(
+        group_terms: Dict[str, Tuple[str, ...]],
+        group_logic: Dict[str, Dict[str, Union[bool, str]]]
+) -> Dict[str, Tuple[str, ...]]:
+    """Apply each group's quoting rule to its terms once up front.
+
+    Args:
+        group_terms: Dictionary of {group_name: sorted_tuple_of_terms}
+        group_logic: Dictionary of {group_name: {"quote": bool, ...}}
+
+    Returns:
+        Dictionary of {group_name: tuple_of_formatted_terms}, same order
+        as the input tuples
+    """
+    # Scan each unique term for spaces once, even when it recurs across groups.
+    has_space = {
+        term: " " in term
+        for terms in group_terms.values()
+        for term in terms
+    }
+    return {
+        group: tuple(
+            clean_term(term, group_logic[group]["quote"], has_space[term])
+            for term in terms
+        )
+        for group, terms in group_terms.items()
+    }
 
-def build_query(group_terms: Dict[str, Set[str]],
+def build_query(group_terms: Dict[str, Tuple[str, ...]],
                 group_logic: Dict[str, Dict[str, Union[bool, str]]]) -> str:
     """Build a query string from grouped terms and logic settings.
 
          Args:
-             group_terms: Dictionary of {group_name: set_of_terms}
+             group_terms: Dictionary of {group_name: sorted_tuple_of_terms}
              group_logic: Dictionary of {group_name: {"quote": bool, "operator": str}}
 
          Returns:
              Fully formatted query string
 
          Example:
-             >>> group_terms = {"color": {"red", "blue"}, "size": {"large"}}
+             >>> group_terms = {"color": ("blue", "red"), "size": ("large",)}
              >>> group_logic = {"color": {"quote": False, "operator": "AND"},
                                "size": {"quote": True, "operator": "AND"}}
              >>> build_query(group_terms, group_logic)
-             '(red OR blue) AND "large"'
+             '(blue OR red) AND ("large")'
          """
-    group_items = [(group, group_terms[group]) for group in group_terms if group_terms[group]]
-    parts = []
+    prepared = prepare_group_terms(group_terms, group_logic)
+    group_items = [(group, terms) for group, terms in prepared.items() if terms]
+    resolved = {
+        g: (gl["operator"], gl.get("internal_operator", "OR"))
+        for g, gl in group_logic.items()
+    }
+    flat = []
 
-    for i, (group, terms) in enumerate(group_items):
-        quote = group_logic[group]["quote"]
-        internal_op = group_logic[group].get("internal_operator", "OR")
-        group_str = format_group(terms, quote, internal_op)
+    for group, terms in group_items:
+        outer_op, internal_op = resolved[group]
+        flat.append(format_group(terms, internal_op))
+        flat.append(outer_op)
 
-        if i < len(group_items) - 1:
-            outer_op = group_logic[group]["operator"]
-            parts.append(f"{group_str} {outer_op}")
-        else:
-            parts.append(group_str)
+    if flat:
+        flat.pop()  # drop the trailing operator
 
-    return " ".join(parts)
+    return " ".join(flat)
 
 def build_queries_by_main_group(
-        group_terms: Dict[str, Set[str]],
+        group_terms: Dict[str, Tuple[str, ...]],
         group_logic: Dict[str, Dict[str, Union[bool, str]]],
         main_group: str
 ) -> List[Tuple[str, str]]:
     """Build one query per unique value in the main group column.
 
       Args:
-          group_terms: Dictionary of {group_name: set_of_terms}
+          group_terms: Dictionary of {group_name: sorted_tuple_of_terms}
           group_logic: Dictionary of group settings
           main_group: The column name to generate individual queries for
 
@@ -88,57 +129,90 @@ def build_queries_by_main_group(
     if main_group not in group_terms:
         raise ValueError(f"Main group '{main_group}' not found in group terms.")
 
-    queries = []
-    static_groups = [(g, group_terms[g]) for g in group_terms if g != main_group and group_terms[g]]
-    main_values = sorted(group_terms[main_group])
-
-    for val in main_values:
-        parts = []
-
-        for i, (group, terms) in enumerate(static_groups):
-            quote = group_logic[group]["quote"]
-            internal_op = group_logic[group].get("internal_operator", "OR")
-            group_str = format_group(terms, quote, internal_op)
-            op = group_logic[group]["operator"]
+    prepared = prepare_group_terms(group_terms, group_logic)
+    static_groups = [(g, t) for g, t in prepared.items() if g != main_group and t]
+    main_values = group_terms[main_group]
 
-            parts.append(f"{group_str} {op}")
-
-        # Add main group value last without trailing operator
-        quote = group_logic[main_group]["quote"]
-        internal_op = group_logic[main_group].get("internal_operator", "OR")
-        main_str = format_group({val}, quote, internal_op)
-        parts.append(main_str)
-
-        queries.append((val, " ".join(parts)))
-
-    return queries
+    resolved = {
+        g: (gl["operator"], gl.get("internal_operator", "OR"))
+        for g, gl in group_logic.items()
+    }
 
-def read_csv_terms(file_path: str) -> Dict[str, Set[str]]:
+    # The non-main groups are identical for every main value, so format them once.
+    static_prefix_parts = []
+    for group, terms in static_groups:
+        outer_op, internal_op = resolved[group]
+        static_prefix_parts.append(format_group(terms, internal_op))
+        static_prefix_parts.append(outer_op)
+    static_prefix = " ".join(static_prefix_parts)
+
+    # The main group value goes last without a trailing operator. Keep the
+    # per-value work to a single concatenation inside a comprehension so
+    # the hot loop runs at C speed rather than through bytecode dispatch.
+    main_pairs = zip(main_values, prepared[main_group])
+    if static_prefix:
+        prefix = f"{static_prefix} ("
+        return [(val, f"{prefix}{formatted})") for val, formatted in main_pairs]
+    return [(val, f"({formatted})") for val, formatted in main_pairs]
+
+def read_csv_terms(file_path: str) -> Dict[str, Tuple[str, ...]]:
     """Read terms from CSV file with auto-detected encoding/delimiter.
 
     Args:
         file_path: Path to CSV file
 
     Returns:
-        Dictionary of {column_name: set_of_terms}
+        Dictionary of {column_name: sorted_tuple_of_terms}
 
     Raises:
         UnicodeDecodeError: If file cannot be read with supported encodings
         csv.Error: If CSV parsing fails
     """
-    encodings = ["utf-8", "utf-8-sig", "windows-1252", "latin-1"]
+    detected, dialect = _detect(file_path)
+    if detected:
+        encodings = [detected, "windows-1252", "latin-1"]
+    else:
+        encodings = ["windows-1252", "latin-1"]
 
     for encoding in encodings:
         try:
+            if pd is not None:
+                # Pandas' C parser tokenizes far faster than the
+                # pure-Python csv module on large files. Skip it when the
+                # header has duplicate names: pandas would mangle them to
+                # "col.1" where the csv path collapses them to one key.
+                with open(file_path, encoding=encoding) as f:
+                    header = next(csv.reader(f, dialect=dialect), [])
+                if len(set(header)) == len(header):
+                    try:
+                        df = pd.read_csv(
+                            file_path, dtype=str, keep_default_na=False,
+                            engine="c", encoding=encoding, sep=dialect.delimiter
+                        )
+                    except (pd.errors.ParserError, pd.errors.EmptyDataError):
+                        # Ragged or empty input that the csv path below
+                        # tolerates; use it so results don't depend on
+                        # whether pandas is installed.
+                        pass
+                    else:
+                        return {
+                            col: tuple(sorted(set(df[col].str.strip()) - {""}))
+                            for col in df.columns
+                        }
             with open(file_path, encoding=encoding) as f:
-                sample = f.read(2048)
-                f.seek(0)
-                dialect = csv.Sniffer().sniff(sample)
-                reader = csv.DictReader(f, dialect=dialect)
-                rows = list(reader)
+                reader = csv.reader(f, dialect=dialect)
+                fieldnames = next(reader, [])
+                cols = [set() for _ in fieldnames]
+                num_cols = len(cols)
+                for row in reader:
+                    # Ignore fields beyond the header width, as DictReader did.
+                    for i, value in enumerate(row[:num_cols]):
+                        value = value.strip()
+                        if value:
+                            cols[i].add(value)
                 return {
-                    col: {row[col].strip() for row in rows if row[col].strip()}
-                    for col in reader.fieldnames
+                    col: tuple(sorted(terms))
+                    for col, terms in zip(fieldnames, cols)
                 }
         except UnicodeDecodeError:
             continue
@@ -146,31 +220,11 @@ def read_csv_terms(file_path: str) -> Dict[str, Set[str]]:
     raise UnicodeDecodeError(f"Could not decode {file_path} with tried encodings: {encodings}")
 
 
-def write_queries(
-        queries: List[Tuple[str, str]],
-        output_path: str,
-        main_group: str = None,
-) -> None:
-    """Write queries to output files.
-
-    Args:
-        queries: List of (value, query_string) tuples
-        output_path: Path for main output file
-        main_group: Name of main group (for labeling)
-    """
-    # Write main query file
-    with open(output_path, "w", encoding="utf-8") as f:
-        for val, query in sorted(queries):
-            if main_group:
-                f.write(f"-- {main_group}: {val} --\n{query}\n\n")
-            else:
-                f.write(f"{query}\n\n")
-
 def write_summary_metadata(
         sq_id: str,
         input_file: str,
         main_group: Union[str, None],
-        group_terms: Dict[str, Set[str]],
+        group_terms: Dict[str, Tuple[str, ...]],
         group_logic: Dict[str, Dict[str, Union[bool, str]]],
         num_queries: int,
         metadata_path: str = "query_summary.csv"
@@ -190,24 +244,27 @@ def write_summary_metadata(
         "group_count", "terms_total", "query_count", "group_logic"
     ]
 
-    data_row = {
-        "sq_id": sq_id,
-        "timestamp": datetime.now().isoformat(timespec="seconds"),
-        "input_file": input_file,
-        "main_group": main_group or "(combined)",
-        "group_count": len(group_terms),
-        "terms_total": sum(len(terms) for terms in group_terms.values()),
-        "query_count": num_queries,
-        "group_logic": "; ".join(
-            f"{g}:{group_logic[g]['operator']}/{group_logic[g].get('internal_operator', 'OR')}"
-            for g in group_terms if g != main_group
-        )
-    }
+    logic_parts = [
+        f"{g}:{group_logic[g]['operator']}/{group_logic[g].get('internal_operator', 'OR')}"
+        for g in group_terms if g != main_group
+    ]
 
-    file_exists = os.path.exists(metadata_path)
+    data_row = [
+        sq_id,
+        datetime.now().isoformat(timespec="seconds"),
+        input_file,
+        main_group or "(combined)",
+        len(group_terms),
+        sum(len(terms) for terms in group_terms.values()),
+        num_queries,
+        "; ".join(logic_parts)
+    ]
 
-    with open(metadata_path, "a", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
+    # Open in a+ and check the write position instead of a separate
+    # os.path.exists stat, which would race with concurrent writers.
+    with open(metadata_path, "a+", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        f.seek(0, os.SEEK_END)
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow(fieldnames)
         writer.writerow(data_row)
\ No newline at end of file